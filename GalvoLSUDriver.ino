@@ -680,6 +680,7 @@ static void sendTelemetry() {
 // {"cmd":"set","path":"dots.testPatternEnable","value":true}
 // {"cmd":"set","path":"dots.testCount","value":100}
 // {"cmd":"dots.inactive","dots":[{"idxNorm":0,"rgbMask":1}, ...]}
+// {"cmd":"dots.inactive","fmt":"u8","dots":[{"p":0,"m":1}, ...]}  (idxNorm = p * 257)
 // {"cmd":"dots.swap","value":true}
 static void processJSONCommand(const String &cmd) {
   DynamicJsonDocument doc(4096);
@@ -735,12 +736,20 @@ static void processJSONCommand(const String &cmd) {
   if (!strcmp(type, "dots.inactive")) {
     JsonArray arr = doc["dots"].as<JsonArray>();
     uint8_t inactive = dotBufferState.config.activeBuffer ^ 1;
+    // compact form: 8-bit position p (0..255 -> 0..65535 exactly) and mask m
+    const bool fmtU8 = !strcmp(doc["fmt"] | "", "u8");
 
     uint16_t n = 0;
     for (JsonVariant v : arr) {
       if (n >= DOT_CAP) break;
-      dotBufferState.buffer[inactive][n].idxNorm = v["idxNorm"] | 0;
-      dotBufferState.buffer[inactive][n].rgbMask = v["rgbMask"] | 0;
+      if (fmtU8) {
+        uint16_t p = min<uint16_t>(v["p"] | 0, 255);
+        dotBufferState.buffer[inactive][n].idxNorm = (uint16_t)(p * 257U);
+        dotBufferState.buffer[inactive][n].rgbMask = v["m"] | 0;
+      } else {
+        dotBufferState.buffer[inactive][n].idxNorm = v["idxNorm"] | 0;
+        dotBufferState.buffer[inactive][n].rgbMask = v["rgbMask"] | 0;
+      }
       n++;
     }
     dotBufferState.dotCount[inactive] = n;
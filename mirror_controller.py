@@ -13,6 +13,7 @@ Commands:
   {"cmd":"set","path":"dots.testPatternEnable","value":true/false}
   {"cmd":"set","path":"dots.testCount","value":100}
   {"cmd":"dots.inactive","dots":[{"idxNorm":0,"rgbMask":1}, ...]}
+  {"cmd":"dots.inactive","fmt":"u8","dots":[{"p":0,"m":1}, ...]}  (idxNorm = p*257)
   {"cmd":"dots.swap","value":true}
 
 This file provides:
@@ -20,8 +21,13 @@ This file provides:
 - Gradio web UI for connect/arm/status/telemetry
 - Dot editor: generate simple patterns, upload inactive, request swap
 
+Dots are handled as two parallel arrays (idxNorm int32, rgbMask uint8) and only
+turned into {idxNorm,rgbMask} dicts / JSON text at the UI and wire boundary.
+
 Install:
   pip install pyserial gradio
+  pip install orjson   (optional, faster JSON on the serial path)
+  pip install numba    (optional, fused image line -> dots kernel)
 
 Run:
   python mirror_controller.py
@@ -29,57 +35,112 @@ Run:
 
 from __future__ import annotations
 
+import collections
+import functools
 import json
+import os
 import time
 import threading
-import queue
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 import serial
 import serial.tools.list_ports
 import gradio as gr
 
+try:
+    import orjson
+except ImportError:  # optional; stdlib json is used instead
+    orjson = None
+
 
 BAUD_RATE = 115200
 READ_TIMEOUT_S = 0.2
+TX_BATCH_MAX = 16  # max queued commands packed into one ser.write()
+PIPELINE_DEPTH = 4  # max commands in flight (sent, reply not yet seen)
+DOTS_U8_MAX = 256  # "fmt":"u8" keeps at most this many positions per line distinct
 DOT_CAP = 100
 
 
+# ------------------------- JSON codec -------------------------
+
+if orjson is not None:
+    def _loads(data: Any) -> Any:
+        # orjson parses bytes directly, no decode step
+        return orjson.loads(data)
+
+    def _dumps_line(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+else:
+    def _loads(data: Any) -> Any:
+        return json.loads(data)
+
+    def _dumps_line(obj: Any) -> bytes:
+        return (json.dumps(obj, separators=(",", ":")) + "\n").encode("utf-8")
+
+
 # ------------------------- Serial client -------------------------
 
+@functools.lru_cache(maxsize=1)
+def _ports_cache(ts: int) -> Tuple[Any, ...]:
+    # ts is time quantized to 1 s, so the OS port scan runs at most once a second
+    return tuple(serial.tools.list_ports.comports())
+
+def _comports() -> Tuple[Any, ...]:
+    return _ports_cache(int(time.time()))
+
 @dataclass
 class DeviceLine:
     t: float
-    raw: str
+    data: bytes  # stripped line as received
     obj: Optional[Dict[str, Any]]
 
+    @property
+    def raw(self) -> str:
+        # decoded on demand (log view, non-JSON replies) rather than for every line
+        return self.data.decode("utf-8", errors="replace")
+
 
 class MirrorSerialClient:
     """
     Line-based JSON serial client.
     - Starts a background thread reading lines and parsing JSON.
-    - send_json() writes a line and optionally waits for the next JSON response line.
-      (Your firmware does not echo seq, so we treat the "next JSON line" as response.)
+    - Starts a background writer thread; it is the only thread touching ser.write(),
+      and packs whatever commands are queued into a single write.
+    - send_json() queues a line and optionally waits for its JSON response line.
+      (Your firmware does not echo seq, but answers every command with exactly one
+      JSON line in order, so replies are matched to commands FIFO.)
+    - wait_json=False pipelines: the call returns once written and the reply is
+      matched in the background; at most PIPELINE_DEPTH commands are in flight.
     """
     def __init__(self) -> None:
         self.ser: Optional[serial.Serial] = None
         self._rx_thread: Optional[threading.Thread] = None
+        self._tx_thread: Optional[threading.Thread] = None
         self._stop = threading.Event()
-        self._rxq: "queue.Queue[DeviceLine]" = queue.Queue(maxsize=1000)
-        self._lock = threading.Lock()
+        # ring buffer of recent lines; appending to a full deque drops the oldest
+        self._rxq: Deque[DeviceLine] = collections.deque(maxlen=1000)
+        # (line, written, reply) waiting for the writer thread
+        self._txq: Deque[Tuple[bytes, Future, Future, float]] = collections.deque()
+        # signalled on enqueue and on close; the writer sleeps on it without a timeout
+        self._tx_cond = threading.Condition()
+        # (deadline, reply) of written commands, oldest first; resolved by the reader.
+        # Guarded by _tx_cond's lock, like _txq.
+        self._pending: Deque[Tuple[float, Future]] = collections.deque()
+        self._inflight = threading.Semaphore(PIPELINE_DEPTH)
 
     @staticmethod
     def list_ports() -> List[Tuple[str, str]]:
         ports = []
-        for p in serial.tools.list_ports.comports():
+        for p in _comports():
             label = f"{p.device} — {p.description}"
             ports.append((p.device, label))
         return ports
 
     @staticmethod
     def autodetect_port() -> str:
-        ports = list(serial.tools.list_ports.comports())
+        ports = _comports()
         for p in ports:
             desc = (p.description or "").lower()
             hwid = (p.hwid or "").lower()
@@ -92,109 +153,222 @@ class MirrorSerialClient:
 
     def open(self, port: str) -> None:
         self.close()
+        _ports_cache.cache_clear()
         self._stop.clear()
         self.ser = serial.Serial(port, BAUD_RATE, timeout=READ_TIMEOUT_S, write_timeout=1.0)
         # give ESP32 time to reboot on DTR toggle
         time.sleep(1.8)
         self._rx_thread = threading.Thread(target=self._reader_loop, daemon=True)
         self._rx_thread.start()
+        self._tx_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._tx_thread.start()
 
     def close(self) -> None:
         self._stop.set()
+        with self._tx_cond:
+            self._tx_cond.notify_all()
         if self._rx_thread and self._rx_thread.is_alive():
             self._rx_thread.join(timeout=0.5)
         self._rx_thread = None
+        if self._tx_thread and self._tx_thread.is_alive():
+            self._tx_thread.join(timeout=1.5)
+        self._tx_thread = None
+        self._fail_tx(RuntimeError("Serial closed"))
+        with self._tx_cond:
+            self._fail_pending(RuntimeError("Serial closed"))
         if self.ser:
             try:
+                self.ser.flush()
                 self.ser.close()
             except Exception:
                 pass
         self.ser = None
         self._drain_rx()
+        _ports_cache.cache_clear()
 
     def _drain_rx(self) -> None:
-        try:
-            while True:
-                self._rxq.get_nowait()
-        except queue.Empty:
-            pass
+        self._rxq.clear()
+
+    def _fail_tx(self, exc: BaseException) -> None:
+        while self._txq:
+            _, written, reply, _ = self._txq.popleft()
+            for fut in (written, reply):
+                if not fut.done():
+                    fut.set_exception(exc)
+
+    def _fail_pending(self, exc: BaseException) -> None:
+        while self._pending:
+            _, fut = self._pending.popleft()
+            if not fut.done():
+                fut.set_exception(exc)
+
+    def _expire_pending(self, now: float) -> None:
+        # Caller holds _tx_cond. Replies that never came (or didn't parse) must not
+        # shift every later reply by one, nor hold an in-flight slot forever.
+        if not any(deadline <= now for deadline, _ in self._pending):
+            return
+        keep = collections.deque()
+        for entry in self._pending:
+            if entry[0] <= now:
+                entry[1].cancel()
+            else:
+                keep.append(entry)
+        self._pending = keep
+
+    def _writer_loop(self) -> None:
+        assert self.ser
+        while not self._stop.is_set():
+            with self._tx_cond:
+                self._tx_cond.wait_for(lambda: self._txq or self._stop.is_set())
+            while self._txq and not self._stop.is_set():
+                batch: List[Tuple[bytes, Future, Future, float]] = []
+                # taken under the lock so send_line can still withdraw an unwritten line;
+                # replies are registered before writing so a fast answer finds its future
+                with self._tx_cond:
+                    while self._txq and len(batch) < TX_BATCH_MAX:
+                        item = self._txq.popleft()
+                        batch.append(item)
+                        self._pending.append((item[3], item[2]))
+                data = b"".join(item[0] for item in batch)
+                try:
+                    # no flush(): it blocks until the OS tx buffer drains; the reply
+                    # wait already orders us against the device
+                    self.ser.write(data)
+                except Exception as e:
+                    with self._tx_cond:
+                        failed = {id(item[2]) for item in batch}
+                        self._pending = collections.deque(
+                            entry for entry in self._pending if id(entry[1]) not in failed)
+                    for _, written, reply, _ in batch:
+                        written.set_exception(e)
+                        if not reply.done():
+                            reply.set_exception(e)
+                    continue
+                for _, written, _, _ in batch:
+                    written.set_result(len(data))
 
     def _reader_loop(self) -> None:
         assert self.ser
+        buf = bytearray()
         while not self._stop.is_set():
             try:
-                line = self.ser.readline()
+                # whatever has arrived (at least 1 byte, bounded by the read timeout);
+                # a telemetry burst is handled in one read instead of one readline per line
+                chunk = self.ser.read(self.ser.in_waiting or 1)
             except Exception:
                 break
-            if not line:
+            if not chunk:
                 continue
-            raw = line.decode("utf-8", errors="replace").strip()
-            obj = None
-            if raw.startswith("{") and raw.endswith("}"):
-                try:
-                    obj = json.loads(raw)
-                except Exception:
-                    obj = None
-            dl = DeviceLine(t=time.time(), raw=raw, obj=obj)
+            buf += chunk
+            if b"\n" not in chunk:
+                continue
+            lines = buf.split(b"\n")
+            buf = lines.pop()  # trailing partial line
+            for line in lines:
+                self._handle_line(line)
+
+    def _handle_line(self, line: bytearray) -> None:
+        data = bytes(line).strip()  # immutable copy; DeviceLine.data outlives buf
+        if not data:
+            return
+        obj = None
+        if data[:1] == b"{" and data[-1:] == b"}":
             try:
-                self._rxq.put_nowait(dl)
-            except queue.Full:
-                # drop oldest
-                try:
-                    _ = self._rxq.get_nowait()
-                except queue.Empty:
-                    pass
-                try:
-                    self._rxq.put_nowait(dl)
-                except queue.Full:
-                    pass
+                obj = _loads(data)
+            except Exception:
+                obj = None
+        dl = DeviceLine(t=time.time(), data=data, obj=obj)
+        self._rxq.append(dl)
+        if obj is not None:
+            # oldest outstanding (not expired) command gets this reply
+            with self._tx_cond:
+                self._expire_pending(dl.t)
+                if self._pending:
+                    _, fut = self._pending.popleft()
+                    fut.set_result(dl)
 
     def send_json(self, payload: Dict[str, Any], wait_json: bool = True, timeout_s: float = 1.0) -> DeviceLine:
+        return self.send_line(_dumps_line(payload), wait_json=wait_json, timeout_s=timeout_s)
+
+    def send_line(self, msg: bytes, wait_json: bool = True, timeout_s: float = 1.0) -> DeviceLine:
+        """
+        Like send_json(), for an already encoded newline-terminated JSON line.
+        """
         if not self.ser or not self.ser.is_open:
             raise RuntimeError("Serial not open")
 
-        msg = json.dumps(payload, separators=(",", ":")) + "\n"
-        with self._lock:
-            self.ser.write(msg.encode("utf-8"))
-            self.ser.flush()
+        deadline = time.time() + timeout_s
+        with self._tx_cond:
+            self._expire_pending(time.time())
+        # back-pressure: blocks while PIPELINE_DEPTH replies are outstanding
+        if not self._inflight.acquire(timeout=timeout_s):
+            return DeviceLine(t=time.time(), data=b"(timeout waiting for pipeline slot)", obj={"error": "timeout"})
+        written: Future = Future()
+        reply: Future = Future()
+        reply.add_done_callback(lambda _: self._inflight.release())
+        item = (msg, written, reply, deadline)
+        with self._tx_cond:
+            self._txq.append(item)
+            self._tx_cond.notify()
+        try:
+            # re-raises write errors (e.g. SerialTimeoutException) in the caller
+            written.result(timeout=max(0.0, deadline - time.time()))
+        except FutureTimeoutError:
+            # writer still busy with earlier batches: drop the line if it hasn't gone out
+            with self._tx_cond:
+                try:
+                    self._txq.remove(item)
+                except ValueError:
+                    pass
+                else:
+                    reply.cancel()
+            return DeviceLine(t=time.time(), data=b"(timeout waiting for write)", obj={"error": "timeout"})
 
         if not wait_json:
-            return DeviceLine(t=time.time(), raw="(sent)", obj=None)
+            return DeviceLine(t=time.time(), data=b"(sent)", obj=None)
 
-        deadline = time.time() + timeout_s
-        while time.time() < deadline:
-            try:
-                dl = self._rxq.get(timeout=0.05)
-            except queue.Empty:
-                continue
-            if dl.obj is not None:
-                return dl
-            # if it's not JSON, keep waiting but we still want it for logs
-        return DeviceLine(t=time.time(), raw="(timeout waiting for JSON)", obj={"error": "timeout"})
-
-    def get_recent_lines(self, max_lines: int = 200) -> List[DeviceLine]:
-        # Non-destructive snapshot: pull all then push back
-        items: List[DeviceLine] = []
+        # non-JSON lines only land in the log buffer; replies resolve the future.
         try:
-            while True:
-                items.append(self._rxq.get_nowait())
-        except queue.Empty:
+            return reply.result(timeout=max(0.0, deadline - time.time()))
+        except FutureTimeoutError:
             pass
-        for it in items:
-            try:
-                self._rxq.put_nowait(it)
-            except queue.Full:
-                break
-        return items[-max_lines:]
+        # Give up on this reply: drop it from the FIFO so the next reply goes to the next
+        # command, and cancel it to free the in-flight slot. (A reply that is merely late
+        # will then be taken by the following command, as with the old "next JSON line".)
+        with self._tx_cond:
+            if reply.done():
+                return reply.result()
+            self._pending = collections.deque(e for e in self._pending if e[1] is not reply)
+            reply.cancel()
+        return DeviceLine(t=time.time(), data=b"(timeout waiting for JSON)", obj={"error": "timeout"})
+
+    def get_recent_lines(self, max_lines: int = 200) -> List[DeviceLine]:
+        # Non-destructive snapshot: list(deque) copies in one shot, so it can't race the
+        # reader's append the way iterating (islice) does
+        return list(self._rxq)[-max_lines:]
+
+    def log_note(self, text: str) -> None:
+        # host-side event in the same log the UI tails, so background failures are visible
+        self._rxq.append(DeviceLine(t=time.time(), data=f"[host] {text}".encode("utf-8"), obj=None))
 
 
 client = MirrorSerialClient()
 
 
 # Add these imports near the top of mirror_controller.py
+import PIL
 from PIL import Image
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:  # optional; the NumPy path is used instead
+    njit = None
+
+# Pillow-SIMD ships as a drop-in "pillow" with versions like "9.0.0.post1"
+# (see requirements-fast.txt). Its resize kernels are AVX2-accelerated.
+PILLOW_SIMD = "post" in PIL.__version__
+
 # ------------------------- Image -> dots -------------------------
 
 def _img_to_rgb_array(path: str) -> np.ndarray:
@@ -204,20 +378,79 @@ def _img_to_rgb_array(path: str) -> np.ndarray:
     im = Image.open(path).convert("RGB")
     return np.array(im, dtype=np.uint8)
 
-def _scale_image_for_dots(rgb: np.ndarray, dot_cap: int) -> np.ndarray:
+def _scale_image_for_dots(rgb: np.ndarray, dot_cap: int, resample: int = Image.BILINEAR) -> np.ndarray:
     """
     Scale image to width=dot_cap (so one row maps to DOT_CAP dot positions).
     Keeps height as-is proportionally (so you can scan multiple lines).
+    resample: any PIL filter; Image.BOX is the fastest downscale under Pillow-SIMD.
     """
     h, w, _ = rgb.shape
     if w == dot_cap:
         return rgb
+    k = w // dot_cap
+    if k >= 2 and w == k * dot_cap and h >= k:
+        # Integer ratio (e.g. 2048 -> 1024): k x k box filter, no resize pass needed.
+        # Trailing rows that don't fill a whole block are dropped.
+        hk = h // k
+        blocks = rgb[:hk * k].reshape(hk, k, dot_cap, k, 3)
+        acc = blocks.sum(axis=(1, 3), dtype=np.uint32)
+        return ((acc + (k * k) // 2) // (k * k)).astype(np.uint8)
     im = Image.fromarray(rgb, mode="RGB")
     new_w = dot_cap
     new_h = max(1, int(round(h * (new_w / float(w)))))
-    im2 = im.resize((new_w, new_h), resample=Image.BILINEAR)
+    im2 = im.resize((new_w, new_h), resample=resample)
     return np.array(im2, dtype=np.uint8)
 
+@functools.lru_cache(maxsize=4)
+def _load_scaled(path: str, mtime: float, dot_cap: int, resample: int) -> np.ndarray:
+    """
+    Decode + scale an image once; cached so auto-scan only slices rows.
+    mtime is part of the key so edits of the file on disk are picked up.
+    Returns a read-only uint8 array shape (H,dot_cap,3).
+    """
+    scaled = _scale_image_for_dots(_img_to_rgb_array(path), dot_cap, resample)
+    scaled.setflags(write=False)
+    return scaled
+
+@functools.lru_cache(maxsize=16)
+def _gamma_lut(g: float) -> np.ndarray:
+    """
+    256-entry uint8 lookup table for out = 255 * (in/255) ** (1/g).
+    """
+    lut = np.clip(((np.arange(256) / 255.0) ** (1.0 / g)) * 255.0, 0, 255).astype(np.uint8)
+    lut.setflags(write=False)
+    return lut
+
+_IDENTITY_LUT = np.arange(256, dtype=np.uint8)
+
+if njit is not None:
+    @njit(cache=True, boundscheck=False)
+    def _line_kernel(row, lut, thr, grid, reverse, out_idx, out_mask):
+        """
+        One pass over a (W,3) uint8 row: gamma LUT, per-channel threshold, pack
+        rgbMask bits and compact the "on" dots into out_idx/out_mask. Returns count.
+        grid[k] is the idxNorm of output position k; reverse reads the row right to
+        left so output stays sorted by idxNorm.
+        """
+        W = row.shape[0]
+        n = 0
+        for k in range(W):
+            x = W - 1 - k if reverse else k
+            m = 0
+            if lut[row[x, 0]] >= thr:
+                m |= 1
+            if lut[row[x, 1]] >= thr:
+                m |= 2
+            if lut[row[x, 2]] >= thr:
+                m |= 4
+            if m:
+                out_idx[n] = grid[k]
+                out_mask[n] = m
+                n += 1
+        return n
+else:
+    _line_kernel = None
+
 def image_line_to_dots(
     image_path: str,
     line_index: Optional[int] = None,
@@ -225,9 +458,11 @@ def image_line_to_dots(
     threshold: int = 32,
     gamma: float = 1.0,
     serpentine: bool = False,
-) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    resample: int = Image.BILINEAR,
+) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
     """
-    Load an image, scale to dot_cap width, pick one horizontal line, and convert to dots list.
+    Load an image, scale to dot_cap width, pick one horizontal line, and convert to dots
+    as two arrays (idxNorm int32, rgbMask uint8) without building per-dot dicts.
 
     Mapping:
       - x maps to idxNorm 0..65535
@@ -239,37 +474,182 @@ def image_line_to_dots(
       threshold: 0..255 per-channel threshold for turning laser on
       gamma: apply gamma to pixel values before threshold (>=0.1)
       serpentine: if True, odd lines are reversed (useful if your scan alternates direction)
+      resample: PIL filter used for the width scaling (default BILINEAR)
 
     Returns:
-      (dots, meta) where meta includes scaled size and selected line.
+      (idx, mask, meta) where meta includes scaled size and selected line.
+    Uses the numba kernel when numba is installed, NumPy otherwise.
     """
-    rgb = _img_to_rgb_array(image_path)
-    scaled = _scale_image_for_dots(rgb, dot_cap)
+    g = max(0.1, float(gamma))
+    scaled = _load_scaled(image_path, os.path.getmtime(image_path), int(dot_cap), int(resample))
 
     H, W, _ = scaled.shape
     if line_index is None:
         line_index = H // 2
     line_index = int(max(0, min(H - 1, line_index)))
 
-    line = scaled[line_index, :, :].astype(np.float32) / 255.0
-    g = max(0.1, float(gamma))
-    if g != 1.0:
-        line = np.power(line, 1.0 / g)
-    line_u8 = np.clip(line * 255.0, 0, 255).astype(np.uint8)
-
-    if serpentine and (line_index % 2 == 1):
-        line_u8 = line_u8[::-1, :]
+    line_u8 = scaled[line_index]
+    # serpentine: the row itself is never reversed; column x maps to grid[W-1-x] instead
+    reverse = bool(serpentine and (line_index % 2 == 1))
 
     thr = int(max(0, min(255, threshold)))
+    lut = _gamma_lut(g) if g != 1.0 else _IDENTITY_LUT
+    grid = _grid_idx(W)  # exact x * 65535 // (W - 1), same as the template grid
 
-    dots: List[Dict[str, Any]] = []
     # Build only "on" dots to save RMT items; skip black pixels
-    for x in range(W):
-        r, g_, b = (int(line_u8[x, 0]), int(line_u8[x, 1]), int(line_u8[x, 2]))
-        mask = (1 if r >= thr else 0) | (2 if g_ >= thr else 0) | (4 if b >= thr else 0)
-        if mask == 0:
-            continue
-    return {"status": "autoscan_stopped"}
+    if _line_kernel is not None:
+        out_idx = np.empty(W, dtype=np.int32)
+        out_mask = np.empty(W, dtype=np.uint8)
+        n = _line_kernel(line_u8, lut, thr, grid, reverse, out_idx, out_mask)
+        idx, mask = out_idx[:n], out_mask[:n]
+    else:
+        if g != 1.0:
+            line_u8 = lut[line_u8]
+        mask = (
+            (line_u8[:, 0] >= thr).astype(np.uint8)
+            | ((line_u8[:, 1] >= thr).astype(np.uint8) << 1)
+            | ((line_u8[:, 2] >= thr).astype(np.uint8) << 2)
+        )
+        on = np.nonzero(mask)[0]
+        if reverse:
+            # rightmost column first, so idx comes out ascending (on[::-1] is a view)
+            on = on[::-1]
+            idx = grid[(W - 1) - on]
+        else:
+            idx = grid[on]
+        mask = mask[on]
+
+    meta = {
+        "image": image_path,
+        "scaled_w": W,
+        "scaled_h": H,
+        "line_index": line_index,
+        "threshold": thr,
+        "gamma": g,
+        "reversed": reverse,
+        "dot_count": int(len(idx)),
+        "pillow_simd": PILLOW_SIMD,
+    }
+    return idx, mask, meta
+
+def _scan_dot_cap(compact: bool) -> int:
+    # the u8 format only has DOTS_U8_MAX distinct positions, so compact lines are scaled to fit
+    return min(DOT_CAP, DOTS_U8_MAX) if compact else DOT_CAP
+
+def push_image_line(
+    image_path: str,
+    line_index: Optional[int],
+    threshold: int,
+    gamma: float,
+    serpentine: bool,
+    do_swap: bool,
+    wait: bool = True,
+    compact: bool = False,
+) -> Dict[str, Any]:
+    """
+    Convert one image line to dots, upload to the inactive buffer and optionally swap.
+    wait=False pipelines the commands (replies only show up in the serial log).
+    compact=True scales the line to at most DOTS_U8_MAX positions and uploads with "fmt":"u8".
+    Opt-in: firmware without fmt support ignores it and puts every dot at idxNorm 0.
+    """
+    idx, mask, meta = image_line_to_dots(image_path, line_index, _scan_dot_cap(compact), threshold, gamma, serpentine)
+    # few enough positions that 8-bit p keeps them distinct -> half the bytes on the wire
+    fmt = "u8" if compact and meta["scaled_w"] <= DOTS_U8_MAX else None
+    meta["fmt"] = fmt or "idxNorm"
+    out: Dict[str, Any] = {"meta": meta, "upload": cmd_upload_dots(idx, mask, wait=wait, fmt=fmt)}
+    if "error" in out["upload"]:
+        # inactive buffer wasn't (reliably) written: swapping would show a stale line
+        out["error"] = "upload_failed"
+    elif do_swap:
+        out["swap"] = cmd_swap(wait=wait)
+    return out
+
+# ------------------------- Auto image scan -------------------------
+
+_autoscan_thread: Optional[threading.Thread] = None
+_autoscan_stop = threading.Event()
+_autoscan_error: Optional[str] = None  # why the last scan ended early, if it did
+
+def _autoscan_loop(
+    image_path: str,
+    start_line: int,
+    end_line: int,
+    interval_s: float,
+    threshold: int,
+    gamma: float,
+    serpentine: bool,
+    do_swap: bool,
+    loop: bool,
+    compact: bool,
+) -> None:
+    global _autoscan_error
+    li = start_line
+    while not _autoscan_stop.is_set():
+        try:
+            # pipelined: the client's in-flight limit paces us against the device
+            r = push_image_line(image_path, li, threshold, gamma, serpentine, do_swap, wait=False, compact=compact)
+        except Exception as e:
+            _autoscan_error = f"line {li}: {e!r}"
+            client.log_note(f"autoscan stopped at {_autoscan_error}")
+            break
+        if "error" in r:
+            client.log_note(f"autoscan line {li}: upload failed, swap skipped")
+        li += 1
+        li += 1
+        if li > end_line:
+            if not loop:
+                break
+            li = start_line
+        _autoscan_stop.wait(interval_s)
+
+def start_auto_image_scan(
+    image_path: str,
+    start_line: int = 0,
+    end_line: Optional[int] = None,
+    interval_ms: int = 50,
+    threshold: int = 32,
+    gamma: float = 1.0,
+    serpentine: bool = False,
+    do_swap: bool = True,
+    loop: bool = True,
+    compact: bool = False,
+) -> Dict[str, Any]:
+    """
+    Start a background thread that pushes image lines start_line..end_line (scaled rows)
+    one after another, every interval_ms. end_line=None means the last row.
+    """
+    global _autoscan_thread, _autoscan_error
+    if not client.is_open():
+        return {"error": "serial_not_open"}
+    stop_auto_image_scan()
+
+    _, _, meta = image_line_to_dots(image_path, 0, _scan_dot_cap(compact), threshold, gamma, serpentine)
+    H = int(meta["scaled_h"])
+    s = int(max(0, min(H - 1, start_line)))
+    e = H - 1 if end_line is None else int(max(s, min(H - 1, end_line)))
+    interval_s = max(0, int(interval_ms)) / 1000.0
+
+    _autoscan_error = None
+    _autoscan_stop.clear()
+    _autoscan_thread = threading.Thread(
+        target=_autoscan_loop,
+        args=(image_path, s, e, interval_s, threshold, gamma, serpentine, do_swap, loop, compact),
+        daemon=True,
+    )
+    _autoscan_thread.start()
+    return {"status": "autoscan_started", "start_line": s, "end_line": e,
+            "interval_ms": int(interval_ms), "loop": bool(loop), "scaled_h": H}
+
+def stop_auto_image_scan() -> Dict[str, Any]:
+    global _autoscan_thread
+    _autoscan_stop.set()
+    if _autoscan_thread and _autoscan_thread.is_alive():
+        _autoscan_thread.join(timeout=2.5)
+    _autoscan_thread = None
+    out: Dict[str, Any] = {"status": "autoscan_stopped"}
+    if _autoscan_error:
+        out["error"] = _autoscan_error
+    return out
 
 # ------------------------- Device-level helpers -------------------------
 
@@ -289,75 +669,135 @@ def cmd_set(path: str, value: Any) -> Dict[str, Any]:
     dl = client.send_json({"cmd": "set", "path": path, "value": value}, timeout_s=1.0)
     return dl.obj or {"raw": dl.raw}
 
-def cmd_upload_dots(dots: List[Dict[str, Any]]) -> Dict[str, Any]:
+def _dots_from_arrays(idx: np.ndarray, mask: np.ndarray) -> List[Dict[str, Any]]:
+    # only for display (UI JSON boxes)
+    return [{"idxNorm": i, "rgbMask": m} for i, m in zip(idx.tolist(), mask.tolist())]
+
+def _encode_dots_inactive(idx: np.ndarray, mask: np.ndarray, fmt: Optional[str] = None) -> bytes:
+    """
+    Encode {"cmd":"dots.inactive","dots":[{idxNorm,rgbMask},...]} + newline straight
+    from the two arrays, without going through per-dot dicts and a JSON encoder.
+    fmt="u8" emits the compact {"p","m"} form; idxNorm is rounded to the nearest
+    multiple of 257 (p = 0..255), which keeps up to DOTS_U8_MAX grid positions distinct.
+    """
+    n = len(idx)
+    # constant geometry (gen_line, fully lit image row): idx is the n-point grid,
+    # so patch the masks into a cached template; cheap scalar checks go first
+    if (n >= 2 and idx[0] == 0 and idx[-1] == 65535 and idx[1] == 65535 // (n - 1)
+            and np.array_equal(idx, _grid_idx(n))):
+        return _grid_template(n, fmt).render(mask)
+    return _encode_dots_inactive_slow(idx, mask, fmt)
+
+def _encode_dots_inactive_slow(idx: np.ndarray, mask: np.ndarray, fmt: Optional[str]) -> bytes:
+    if fmt == "u8":
+        p = (idx.astype(np.int32) + 128) // 257
+        body = ",".join([f'{{"p":{i},"m":{m}}}' for i, m in zip(p.tolist(), mask.tolist())])
+        return b'{"cmd":"dots.inactive","fmt":"u8","dots":[' + body.encode("ascii") + b']}\n'
+    body = ",".join([f'{{"idxNorm":{i},"rgbMask":{m}}}' for i, m in zip(idx.tolist(), mask.tolist())])
+    return b'{"cmd":"dots.inactive","dots":[' + body.encode("ascii") + b']}\n'
+
+class _DotsTemplate:
+    """
+    dots.inactive line pre-encoded for a fixed idx array, with a one-byte hole for
+    each rgbMask digit. render() copies the bytes and patches the digits in one
+    NumPy scatter, so no per-dot formatting happens per frame.
+    """
+    def __init__(self, idx: np.ndarray, fmt: Optional[str]) -> None:
+        self.idx = idx
+        hole = np.zeros(len(idx), dtype=np.uint8)  # NUL never occurs in the JSON text
+        line = _encode_dots_inactive_slow(idx, hole, fmt).replace(b"0}", b"\x00}")
+        self._buf = line
+        self._holes = np.flatnonzero(np.frombuffer(line, dtype=np.uint8) == 0)
+
+    def render(self, mask: np.ndarray) -> bytes:
+        buf = bytearray(self._buf)
+        np.frombuffer(buf, dtype=np.uint8)[self._holes] = (mask & 0x07) + ord("0")
+        return bytes(buf)
+
+@functools.lru_cache(maxsize=8)
+def _grid_template(n: int, fmt: Optional[str]) -> _DotsTemplate:
+    return _DotsTemplate(_grid_idx(n), fmt)
+
+def cmd_upload_dots(idx: np.ndarray, mask: np.ndarray, wait: bool = True,
+                    fmt: Optional[str] = None) -> Dict[str, Any]:
     # firmware expects {"cmd":"dots.inactive","dots":[{idxNorm,rgbMask},...]}
-    dl = client.send_json({"cmd": "dots.inactive", "dots": dots}, timeout_s=2.0)
+    dl = client.send_line(_encode_dots_inactive(idx, mask, fmt), wait_json=wait, timeout_s=2.0)
     return dl.obj or {"raw": dl.raw}
 
-def cmd_swap() -> Dict[str, Any]:
-    dl = client.send_json({"cmd": "dots.swap", "value": True}, timeout_s=1.0)
+def cmd_swap(wait: bool = True) -> Dict[str, Any]:
+    dl = client.send_json({"cmd": "dots.swap", "value": True}, wait_json=wait, timeout_s=1.0)
     return dl.obj or {"raw": dl.raw}
 
 
 # ------------------------- Dot generators -------------------------
 
-def gen_single_dot(idx_norm: int, rgb_mask: int) -> List[Dict[str, Any]]:
+# All generators return (idx int32[N], mask uint8[N]) sorted by idx.
+
+def gen_single_dot(idx_norm: int, rgb_mask: int) -> Tuple[np.ndarray, np.ndarray]:
     idx = max(0, min(65535, int(idx_norm)))
     mask = int(rgb_mask) & 0x07
-    return [{"idxNorm": idx, "rgbMask": mask}]
+    return np.array([idx], dtype=np.int32), np.array([mask], dtype=np.uint8)
+
+@functools.lru_cache(maxsize=16)
+def _grid_idx(n: int) -> np.ndarray:
+    """
+    n evenly spaced idxNorm positions 0..65535 (int32), i * 65535 // (n - 1) in
+    exact integer math (linspace's float products truncate 1 low for some n).
+    Cached and read-only; image columns and gen_line share it.
+    """
+    if n < 2:
+        grid = np.zeros(max(0, n), dtype=np.int32)
+    else:
+        grid = (np.arange(n, dtype=np.int64) * 65535 // (n - 1)).astype(np.int32)
+    grid.setflags(write=False)
+    return grid
 
-def gen_line(n: int, rgb_mask: int) -> List[Dict[str, Any]]:
+def gen_line(n: int, rgb_mask: int) -> Tuple[np.ndarray, np.ndarray]:
     n = int(n)
     n = max(1, min(DOT_CAP, n))
     mask = int(rgb_mask) & 0x07
     if n == 1:
-        return [{"idxNorm": 32768, "rgbMask": mask}]
-    out = []
-    for i in range(n):
-        idx = int(i * 65535 / (n - 1))
-        out.append({"idxNorm": idx, "rgbMask": mask})
-    return out
+        return gen_single_dot(32768, mask)
+    return _grid_idx(n), np.full(n, mask, dtype=np.uint8)
 
-def gen_color_bars(n_per_color: int) -> List[Dict[str, Any]]:
+def gen_color_bars(n_per_color: int) -> Tuple[np.ndarray, np.ndarray]:
     n = max(1, min(DOT_CAP // 3, int(n_per_color)))
-    out: List[Dict[str, Any]] = []
     # R then G then B across the sweep
-    for i in range(n):
-        out.append({"idxNorm": int(i * 65535 / max(1, (n - 1))), "rgbMask": 0b001})
-    for i in range(n):
-        out.append({"idxNorm": int(i * 65535 / max(1, (n - 1))), "rgbMask": 0b010})
-    for i in range(n):
-        out.append({"idxNorm": int(i * 65535 / max(1, (n - 1))), "rgbMask": 0b100})
-    # Sort by idxNorm so RMT builder is efficient/monotonic
-    out.sort(key=lambda d: d["idxNorm"])
-    return out[:DOT_CAP]
-
-def parse_dots_json(text: str) -> Tuple[List[Dict[str, Any]], str]:
+    idx = np.tile(_grid_idx(n), 3)
+    mask = np.repeat(np.array([0b001, 0b010, 0b100], dtype=np.uint8), n)
+    # Sort by idxNorm so RMT builder is efficient/monotonic (stable: R,G,B on ties)
+    order = np.argsort(idx, kind="stable")[:DOT_CAP]
+    return idx[order], mask[order]
+
+_NO_DOTS = (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.uint8))
+
+def parse_dots_json(text: str) -> Tuple[np.ndarray, np.ndarray, str]:
     text = (text or "").strip()
     if not text:
-        return [], "empty"
+        return (*_NO_DOTS, "empty")
     try:
-        obj = json.loads(text)
+        obj = _loads(text)
     except Exception as e:
-        return [], f"JSON parse error: {e}"
+        return (*_NO_DOTS, f"JSON parse error: {e}")
 
-    dots: List[Dict[str, Any]] = []
     if isinstance(obj, dict) and "dots" in obj:
         obj = obj["dots"]
 
     if not isinstance(obj, list):
-        return [], "expected a JSON list of dots or {dots:[...]}"
+        return (*_NO_DOTS, "expected a JSON list of dots or {dots:[...]}")
+    idxs: List[int] = []
+    masks: List[int] = []
     for v in obj:
         if not isinstance(v, dict):
             continue
-        idx = int(v.get("idxNorm", 0))
-        mask = int(v.get("rgbMask", 0)) & 0x07
-        idx = max(0, min(65535, idx))
-        dots.append({"idxNorm": idx, "rgbMask": mask})
-        if len(dots) >= DOT_CAP:
+        idxs.append(max(0, min(65535, int(v.get("idxNorm", 0)))))
+        masks.append(int(v.get("rgbMask", 0)) & 0x07)
+        if len(idxs) >= DOT_CAP:
             break
-    dots.sort(key=lambda d: d["idxNorm"])
-    return dots, f"ok ({len(dots)} dots)"
+    idx = np.array(idxs, dtype=np.int32)
+    mask = np.array(masks, dtype=np.uint8)
+    order = np.argsort(idx, kind="stable")
+    return idx[order], mask[order], f"ok ({len(idx)} dots)"
 
 # ------------------------- Gradio UI actions -------------------------
 
@@ -406,19 +846,20 @@ def ui_set_dots_settings(test_enable: bool, test_count: int) -> str:
 
 def ui_make_pattern(kind: str, n: int, idx: int, rgb_mask: int) -> Tuple[str, str]:
     if kind == "single":
-        dots = gen_single_dot(idx, rgb_mask)
+        idx_a, mask_a = gen_single_dot(idx, rgb_mask)
     elif kind == "line":
-        dots = gen_line(n, rgb_mask)
+        idx_a, mask_a = gen_line(n, rgb_mask)
     else:
-        dots = gen_color_bars(n)
+        idx_a, mask_a = gen_color_bars(n)
+    dots = _dots_from_arrays(idx_a, mask_a)
     txt = json.dumps(dots, indent=2)
     return txt, f"generated {len(dots)} dots"
 
 def ui_upload_and_swap(dots_json_text: str, do_swap: bool) -> str:
-    dots, msg = parse_dots_json(dots_json_text)
-    if not dots:
+    idx, mask, msg = parse_dots_json(dots_json_text)
+    if not len(idx):
         return json.dumps({"error": "no_dots", "detail": msg}, indent=2)
-    up = cmd_upload_dots(dots)
+    up = cmd_upload_dots(idx, mask)
     out: Dict[str, Any] = {"upload": up}
     if do_swap:
         out["swap"] = cmd_swap()
@@ -510,6 +951,7 @@ def build_app() -> gr.Blocks:
                     gam = gr.Number(label="Gamma", value=1.0, precision=2)
                     serp = gr.Checkbox(label="Serpentine reverse on odd lines", value=False)
                     img_swap = gr.Checkbox(label="Swap after upload", value=True)
+                    img_compact = gr.Checkbox(label="Compact u8 upload (scales to 256 wide, needs fmt:u8 firmware)", value=False)
                 with gr.Row():
                     preview_btn = gr.Button("Generate (no send)")
                     send_line_btn = gr.Button("Send line now")
@@ -524,22 +966,23 @@ def build_app() -> gr.Blocks:
                             li = int(line_index)
                     except Exception:
                         li = None
-                    dots, meta = image_line_to_dots(image_path, li, DOT_CAP, int(threshold), float(gamma), bool(serpentine))
-                    return json.dumps(meta, indent=2), json.dumps(dots[:200], indent=2)
+                    idx, mask, meta = image_line_to_dots(image_path, li, DOT_CAP, int(threshold), float(gamma), bool(serpentine))
+                    return json.dumps(meta, indent=2), json.dumps(_dots_from_arrays(idx[:200], mask[:200]), indent=2)
 
-                def ui_send_image_line(image_path, line_index, threshold, gamma, serpentine, do_swap):
+                def ui_send_image_line(image_path, line_index, threshold, gamma, serpentine, do_swap, compact):
                     li = None
                     try:
                         if line_index is not None and str(line_index) != "nan":
                             li = int(line_index)
                     except Exception:
                         li = None
-                    resp = push_image_line(image_path, li, int(threshold), float(gamma), bool(serpentine), bool(do_swap))
+                    resp = push_image_line(image_path, li, int(threshold), float(gamma), bool(serpentine), bool(do_swap),
+                                           compact=bool(compact))
                     return json.dumps(resp, indent=2)
 
                 preview_btn.click(fn=ui_preview_image_line, inputs=[img_path, line_idx, thr, gam, serp],
                                 outputs=[img_meta, img_dots_preview])
-                send_line_btn.click(fn=ui_send_image_line, inputs=[img_path, line_idx, thr, gam, serp, img_swap],
+                send_line_btn.click(fn=ui_send_image_line, inputs=[img_path, line_idx, thr, gam, serp, img_swap, img_compact],
                                     outputs=resp_box)
             with gr.Column():
                 gr.Markdown("### Auto Image Scan")
@@ -553,7 +996,7 @@ def build_app() -> gr.Blocks:
                     auto_start_btn = gr.Button("Start Auto Scan")
                     auto_stop_btn = gr.Button("Stop Auto Scan")
 
-                def ui_start_autoscan(image_path, start_line, end_line, interval_ms, threshold, gamma, serpentine, do_swap, loop):
+                def ui_start_autoscan(image_path, start_line, end_line, interval_ms, threshold, gamma, serpentine, do_swap, loop, compact):
                     e = None
                     try:
                         if end_line is not None and str(end_line) != "nan":
@@ -571,6 +1014,7 @@ def build_app() -> gr.Blocks:
                             serpentine=bool(serpentine),
                             do_swap=bool(do_swap),
                             loop=bool(loop),
+                            compact=bool(compact),
                         ),
                         indent=2
                     )
@@ -579,7 +1023,7 @@ def build_app() -> gr.Blocks:
                     return json.dumps(stop_auto_image_scan(), indent=2)
 
                 auto_start_btn.click(fn=ui_start_autoscan,
-                                    inputs=[img_path, auto_start_line, auto_end_line, auto_interval, thr, gam, serp, img_swap, auto_loop],
+                                    inputs=[img_path, auto_start_line, auto_end_line, auto_interval, thr, gam, serp, img_swap, auto_loop, img_compact],
                                     outputs=resp_box)
                 auto_stop_btn.click(fn=ui_stop_autoscan, outputs=resp_box)
         dots_json = gr.Code(label="Dots JSON (list of {idxNorm,rgbMask})", language="json")
@@ -605,6 +1049,7 @@ def build_app() -> gr.Blocks:
 
 
 if __name__ == "__main__":
+    print(f"Pillow {PIL.__version__}" + (" (SIMD)" if PILLOW_SIMD else ""))
     app = build_app()
     # Set share=True if you want a public link
     app.launch(server_name="0.0.0.0", server_port=7860)
\ No newline at end of file